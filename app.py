@@ -1,6 +1,8 @@
+import sys
 from datetime import datetime, timezone
 from typing import List, Optional
 from fastapi import FastAPI, HTTPException
+from fastapi.responses import JSONResponse, Response
 from pydantic import BaseModel
 from fastapi.middleware.cors import CORSMiddleware
 
@@ -29,18 +31,25 @@ class ScheduleRequest(BaseModel):
     system_dt: Optional[datetime] = None
     language: str = "tr"
 
+# Sabit yanıt: her istekte JSON üretmeye gerek yok
+_HEALTH = Response(content=b'{"status":"ok"}', media_type="application/json")
+
 @app.get("/health")
 def health():
-    return {"status": "ok"}
+    return _HEALTH
 
-@app.post("/schedule")
-def schedule(req: ScheduleRequest):
+# schedule_cards saf CPU işi ve kısa sürüyor; threadpool'a aktarmadan
+# doğrudan event loop üzerinde çalıştırılır.
+@app.post("/schedule", response_model=None)
+async def schedule(req: ScheduleRequest):
     if not req.cards or len(req.cards) < 1:
         raise HTTPException(status_code=400, detail="En az bir kart vermelisiniz.")
 
+    # Kart adları intern edilir: istekler arası _schedule_for_day önbellek
+    # anahtarı karşılaştırmalarında aynı adlar işaretçi eşitliğiyle eşleşir.
     card_list = [
         CardInput(
-            card_name=c.card_name,
+            card_name=sys.intern(c.card_name),
             statement_closing_day=c.statement_closing_day,
             payment_due_day=c.payment_due_day,
             grace_period=c.grace_period,
@@ -61,4 +70,5 @@ def schedule(req: ScheduleRequest):
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Hesaplama hatası: {str(e)}")
 
-    return {"rows": rows}
+    # Satırlar zaten düz str sözlükleri; jsonable_encoder geçişine gerek yok
+    return JSONResponse({"rows": rows})
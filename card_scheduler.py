@@ -5,36 +5,46 @@
 
 from __future__ import annotations
 from dataclasses import dataclass
-from datetime import datetime, date, timedelta, timezone
+from functools import lru_cache
+from datetime import datetime, date, timedelta
 from zoneinfo import ZoneInfo
-from typing import Optional, List, Dict
+from typing import Optional, List, Dict, Set, Tuple, Callable
 
 # ---------------------- Türkiye Defaults ----------------------
 
 TURKEY_TZ = ZoneInfo("Europe/Istanbul")
 WEEKENDS = (5, 6)  # Cumartesi, Pazar
+WEEKEND_MASK = sum(1 << wd for wd in WEEKENDS)  # 0b1100000
 DEFAULT_GRACE = 10
 
 # Month names for formatting (short form)
 MONTH_NAMES_TR = ["Oca","Şub","Mar","Nis","May","Haz","Tem","Ağu","Eyl","Eki","Kas","Ara"]
 MONTH_NAMES_EN = ["Jan","Feb","Mar","Apr","May","Jun","Jul","Aug","Sep","Oct","Nov","Dec"]
 
-@dataclass
+# Hazır "gün ay" metinleri, indeks: (ay-1)*31 + (gün-1)
+_DAY_STRINGS_TR = tuple(f"{day} {name}" for name in MONTH_NAMES_TR for day in range(1, 32))
+_DAY_STRINGS_EN = tuple(f"{day} {name}" for name in MONTH_NAMES_EN for day in range(1, 32))
+
+@dataclass(slots=True, frozen=True)
 class CardInput:
     card_name: str
     statement_closing_day: Optional[int]  # 1..31 or None
     payment_due_day: Optional[int]        # 1..31 or None
     grace_period: Optional[int]           # days or None
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class CardComputed:
     card: CardInput
     closing: date
     payment: date
 
+# İstek boyunca (id(kart), yıl, ay) -> CardComputed
+ComputeCache = Dict[Tuple[int, int, int], CardComputed]
+
 # ---------------------- Tatiller ----------------------
 
-def _turkey_holidays(year: int) -> set[date]:
+@lru_cache(maxsize=64)
+def _turkey_holidays(year: int) -> frozenset[date]:
     """Her yıl için sabit tatil günlerini döndürür."""
     holidays: set[date] = set()
 
@@ -56,45 +66,64 @@ def _turkey_holidays(year: int) -> set[date]:
         for d in range(27, 31):
             holidays.add(date(2026, 5, d))
 
-    return holidays
+    # Önbellekte paylaşıldığı için değiştirilemez döndürülür
+    return frozenset(holidays)
+
+@lru_cache(maxsize=64)
+def _holiday_ordinals(year: int) -> frozenset[int]:
+    """Tatil günlerini date.toordinal() değerleri olarak döndürür."""
+    return frozenset(d.toordinal() for d in _turkey_holidays(year))
 
 # ---------------------- Yardımcı Fonksiyonlar ----------------------
 
 def _is_business_day(d: date) -> bool:
-    if d.weekday() in WEEKENDS:
+    if (WEEKEND_MASK >> d.weekday()) & 1:
         return False
-    if d in _turkey_holidays(d.year):
+    if d.toordinal() in _holiday_ordinals(d.year):
         return False
     return True
 
+@lru_cache(maxsize=64)
+def _non_business_days(year: int) -> bytes:
+    """Yılın her günü için bir bayt: 1 = iş günü değil, 0 = iş günü."""
+    start = date(year, 1, 1)
+    n = (date(year + 1, 1, 1) - start).days
+    return bytes(0 if _is_business_day(start + timedelta(days=i)) else 1 for i in range(n))
+
 def _next_business_day_on_or_after(d: date) -> date:
-    cur = d
-    while not _is_business_day(cur):
-        cur += timedelta(days=1)
-    return cur
+    y = d.year
+    i = d.timetuple().tm_yday - 1
+    while True:
+        j = _non_business_days(y).find(0, i)
+        if j >= 0:
+            return date(y, 1, 1) + timedelta(days=j)
+        y, i = y + 1, 0
+
+def _shift_month(y: int, m: int, k: int) -> Tuple[int, int]:
+    """(y, m) ayından k ay ileri (k < 0 ise geri) gider."""
+    y2, m0 = divmod(y * 12 + (m - 1) + k, 12)
+    return y2, m0 + 1
+
+_DIM = (31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31)
 
 def _days_in_month(y: int, m: int) -> int:
-    if m == 12:
-        nxt = date(y+1, 1, 1)
-    else:
-        nxt = date(y, m+1, 1)
-    return (nxt - timedelta(days=1)).day
+    if m == 2 and (y % 4 == 0 and (y % 100 != 0 or y % 400 == 0)):
+        return 29
+    return _DIM[m-1]
 
 def _mk_date_from_day(y: int, m: int, day: int) -> date:
-    dim = _days_in_month(y, m)
-    d = min(day, dim)
-    return date(y, m, d)
+    return date(y, m, min(day, _days_in_month(y, m)))
 
 def _format_day_tr(d: date) -> str:
-    return f"{d.day} {MONTH_NAMES_TR[d.month-1]}"
+    return _DAY_STRINGS_TR[(d.month-1)*31 + d.day-1]
 
 def _format_day_en(d: date) -> str:
-    return f"{d.day} {MONTH_NAMES_EN[d.month-1]}"
+    return _DAY_STRINGS_EN[(d.month-1)*31 + d.day-1]
 
-def _fmt(d: date, language: str) -> str:
+def _formatter(language: str) -> Callable[[date], str]:
     if language.lower().startswith("tr"):
-        return _format_day_tr(d)
-    return _format_day_en(d)
+        return _format_day_tr
+    return _format_day_en
 
 def _compute_closing_payment_for_month(y: int, m: int, card: CardInput) -> CardComputed:
     grace = card.grace_period if card.grace_period is not None else DEFAULT_GRACE
@@ -112,15 +141,33 @@ def _compute_closing_payment_for_month(y: int, m: int, card: CardInput) -> CardC
 
     return CardComputed(card=card, closing=closing, payment=payment)
 
-def _advance_if_past(today: date, comp: CardComputed) -> CardComputed:
+def _compute_cached(y: int, m: int, card: CardInput, cache: Optional[ComputeCache]) -> CardComputed:
+    if cache is None:
+        return _compute_closing_payment_for_month(y, m, card)
+    key = (id(card), y, m)
+    r = cache.get(key)
+    if r is None:
+        r = _compute_closing_payment_for_month(y, m, card)
+        cache[key] = r
+    return r
+
+def _advance_if_past(today: date, comp: CardComputed, cache: Optional[ComputeCache] = None) -> CardComputed:
+    if comp.closing >= today:
+        return comp
     y, m = comp.closing.year, comp.closing.month
     card = comp.card
+    # Aradaki ayları tek tek hesaplamak yerine kesimi kesinlikle bugünden
+    # önce kalan son aya atla. Bir ayın kesimi en geç o ayın sonu + (-grace)
+    # gün olabilir; negatif grace kesimi sonraki aylara taşıdığı için her
+    # 28 günü için bir ay daha geride kalınır.
+    grace = card.grace_period if card.grace_period is not None else DEFAULT_GRACE
+    lag = -(grace // 28) if grace < 0 else 0
+    skip = (today.year - y) * 12 + (today.month - m) - 2 - lag
+    if skip > 0:
+        y, m = _shift_month(y, m, skip)
     while comp.closing < today:
-        if m == 12:
-            y, m = y + 1, 1
-        else:
-            m += 1
-        comp = _compute_closing_payment_for_month(y, m, card)
+        y, m = _shift_month(y, m, 1)
+        comp = _compute_cached(y, m, card, cache)
     return comp
 
 def _all_current_pairs(today: date, cards: List[CardInput]) -> List[CardComputed]:
@@ -133,30 +180,76 @@ def _all_current_pairs(today: date, cards: List[CardInput]) -> List[CardComputed
     return pairs
 
 def _pick_first_row(pairs: List[CardComputed]) -> List[CardComputed]:
-    if not pairs:
-        return []
-    max_pay = max(p.payment for p in pairs)
-    candidates = [p for p in pairs if p.payment == max_pay]
+    candidates: List[CardComputed] = []
+    max_pay: Optional[date] = None
+    for p in pairs:
+        if max_pay is None or p.payment > max_pay:
+            max_pay, candidates = p.payment, [p]
+        elif p.payment == max_pay:
+            candidates.append(p)
     return candidates
 
-def _nearest_other_closing_after(pairs: List[CardComputed], excluding_cards: List[str], start_inclusive: date) -> Optional[date]:
-    others = [p.closing for p in pairs if p.card.card_name not in excluding_cards and p.closing >= start_inclusive]
-    if not others:
-        return None
-    return min(others)
+def _nearest_other_closing_after(pairs: List[CardComputed], excluding_cards: Set[str], start_inclusive: date) -> Optional[date]:
+    return min((p.closing for p in pairs if p.card.card_name not in excluding_cards and p.closing >= start_inclusive),
+               default=None)
 
 def _group_by_use_date(pairs: List[CardComputed]) -> List[List[CardComputed]]:
-    grouped = []
+    grouped: Dict[Tuple[date, date], List[CardComputed]] = {}
     for p in pairs:
-        added = False
-        for group in grouped:
-            if group[0].closing == p.closing and group[0].payment == p.payment:
-                group.append(p)
-                added = True
-                break
-        if not added:
-            grouped.append([p])
-    return grouped
+        grouped.setdefault((p.closing, p.payment), []).append(p)
+    return list(grouped.values())
+
+def _next_own_closing_after(cpair: CardComputed, start_after_inclusive: date,
+                            cache: Optional[ComputeCache] = None) -> CardComputed:
+    return _advance_if_past(start_after_inclusive, cpair, cache)
+
+def _prev_own_closing_before(cpair: CardComputed, start_exclusive: date,
+                             cache: Optional[ComputeCache] = None) -> date:
+    y, m = start_exclusive.year, start_exclusive.month
+    card = cpair.card
+    comp = _compute_cached(y, m, card, cache)
+    while comp.closing > start_exclusive:
+        y, m = _shift_month(y, m, -1)
+        comp = _compute_cached(y, m, card, cache)
+    return comp.closing
+
+def _add_row(
+    rows: List[Dict],
+    picks: List[CardComputed],
+    begin: date,
+    end: date,
+    is_first: bool,
+    fmt: Callable[[date], str],
+    cache: Optional[ComputeCache] = None,
+):
+    usage = f"{fmt(begin)} – {fmt(end)}"
+    if is_first:
+        for p in picks:
+            after = _next_own_closing_after(p, end + timedelta(days=1), cache)
+            closing_for_use = after.closing
+            payment_for_use = after.payment
+            row = {
+                "Kart Adı": p.card.card_name,
+                "Beklenen Kesim": "",
+                "Kullanım": usage,
+                "Kesim": fmt(closing_for_use),
+                "Ödeme": fmt(payment_for_use),
+            }
+            rows.append(row)
+    else:
+        groups = _group_by_use_date(picks)
+        for group in groups:
+            after = _next_own_closing_after(group[0], end + timedelta(days=1), cache)
+            closing_for_use = after.closing
+            payment_for_use = after.payment
+            row = {
+                "Kart Adı": ", ".join([p.card.card_name for p in group]),
+                "Beklenen Kesim": fmt(_prev_own_closing_before(group[0], end + timedelta(days=1), cache)),
+                "Kullanım": usage,
+                "Kesim": fmt(closing_for_use),
+                "Ödeme": fmt(payment_for_use),
+            }
+            rows.append(row)
 
 # ---------------------- Ana Fonksiyon ----------------------
 
@@ -172,23 +265,36 @@ def schedule_cards(cards: List[CardInput],
         return []
 
     if system_dt is None:
-        base_dt = datetime.now(timezone.utc).astimezone(TURKEY_TZ)
+        today_local = datetime.now(TURKEY_TZ).date()
+    elif system_dt.tzinfo is TURKEY_TZ:
+        today_local = system_dt.date()
     else:
-        base_dt = system_dt.astimezone(TURKEY_TZ)
-
-    today_local = base_dt.date()
-    per_card_pairs: Dict[str, CardComputed] = {}
-    for c in cards:
-        comp0 = _compute_closing_payment_for_month(today_local.year, today_local.month, c)
-        comp = _advance_if_past(today_local, comp0)
-        per_card_pairs[c.card_name] = comp
-
-    pairs = list(per_card_pairs.values())
+        today_local = system_dt.astimezone(TURKEY_TZ).date()
+
+    # Sonuç yalnızca kartlara, yerel güne ve dile bağlı; önbellekteki
+    # satırlar çağıranın değiştirebilmesi için kopyalanır.
+    rows = _schedule_for_day(tuple(cards), today_local, language)
+    return [dict(r) for r in rows]
+
+@lru_cache(maxsize=1024)
+def _schedule_for_day(cards: Tuple[CardInput, ...],
+                      today_local: date,
+                      language: str) -> List[Dict]:
+    compute_cache: ComputeCache = {}
+    fmt = _formatter(language)
+    # Aynı ada sahip kartlar birleştirilir (ilk sıra, son kart): kart seçimi
+    # ve hariç tutma ada göre yapılıyor.
+    pairs = list({
+        c.card_name: _advance_if_past(today_local,
+                                      _compute_cached(today_local.year, today_local.month, c, compute_cache),
+                                      compute_cache)
+        for c in cards
+    }.values())
     rows: List[Dict] = []
 
     # 1st row selection
     first_row_cards = _pick_first_row(pairs)
-    selected_names = [p.card.card_name for p in first_row_cards]
+    selected_names = {p.card.card_name for p in first_row_cards}
 
     begins: List[date] = [today_local]
     begin = min(begins) if begins else today_local
@@ -196,94 +302,48 @@ def schedule_cards(cards: List[CardInput],
     nearest_other = _nearest_other_closing_after(pairs, excluding_cards=selected_names, start_inclusive=begin)
     end = nearest_other if nearest_other else begin
 
-    def next_own_closing_after(cpair: CardComputed, start_after_inclusive: date) -> CardComputed:
-        y, m = cpair.closing.year, cpair.closing.month
-        card = cpair.card
-        comp = cpair
-        while comp.closing < start_after_inclusive:
-            if m == 12:
-                y, m = y + 1, 1
-            else:
-                m += 1
-            comp = _compute_closing_payment_for_month(y, m, card)
-        return comp
+    _add_row(rows, first_row_cards, begin, end, is_first=True, fmt=fmt, cache=compute_cache)
 
-    def prev_own_closing_before(cpair: CardComputed, start_exclusive: date) -> Optional[date]:
-        y, m = start_exclusive.year, start_exclusive.month
-        card = cpair.card
-        comp = _compute_closing_payment_for_month(y, m, card)
-        while comp.closing > start_exclusive:
-            if m == 1:
-                y, m = y - 1, 12
-            else:
-                m -= 1
-            comp = _compute_closing_payment_for_month(y, m, card)
-        return comp.closing
-
-    def add_row(
-        picks: List[CardComputed],
-        begin: date,
-        end: date,
-        is_first: bool,
-        number_override: Optional[int] = None,
-    ):
-        if is_first:
-            for p in picks:
-                after = next_own_closing_after(p, end + timedelta(days=1))
-                closing_for_use = after.closing
-                payment_for_use = after.payment
-                row = {
-                    "Kart Adı": p.card.card_name,
-                    "Beklenen Kesim": "",
-                    "Kullanım": f"{_fmt(begin, language)} – {_fmt(end, language)}",
-                    "Kesim": _fmt(closing_for_use, language),
-                    "Ödeme": _fmt(payment_for_use, language),
-                }
-                rows.append(row)
-        else:
-            groups = _group_by_use_date(picks)
-            for group in groups:
-                after = next_own_closing_after(group[0], end + timedelta(days=1))
-                closing_for_use = after.closing
-                payment_for_use = after.payment
-                row = {
-                    "Kart Adı": ", ".join([p.card.card_name for p in group]),
-                    "Beklenen Kesim": _fmt(prev_own_closing_before(group[0], end + timedelta(days=1)), language),
-                    "Kullanım": f"{_fmt(begin, language)} – {_fmt(end, language)}",
-                    "Kesim": _fmt(closing_for_use, language),
-                    "Ödeme": _fmt(payment_for_use, language),
-                }
-                rows.append(row)
-
-    add_row(first_row_cards, begin, end, is_first=True, number_override=1)
+    if len(cards) == 1:
+        # Tek kart: seçim döngüsüne gerek yok, ikinci satır doğrudan eklenir
+        row_begin = end + timedelta(days=1)
+        row_end = _next_own_closing_after(pairs[0], row_begin, compute_cache).closing
+        _add_row(rows, pairs, row_begin, row_end, is_first=False, fmt=fmt, cache=compute_cache)
+        return rows
 
     used_rows = 1
     max_rows = len(cards) + 1
     prev_row_begin = begin
     prev_row_end = end
 
-    while used_rows < max_rows:
-        candidates = []
-        for p in pairs:
-            after_for_selection = next_own_closing_after(p, prev_row_begin)
-            candidates.append((after_for_selection.closing, after_for_selection.payment, p))
+    # Her kartın prev_row_begin'den itibaren ilk kesimi. Bir satırın row_end
+    # hesabı, sonraki satırın seçim adaylarını da verdiği için tek geçişte
+    # hesaplanıp devredilir. Arama her seferinde özgün çiftten başlar:
+    # negatif grace ile kesim hesaplandığı aydan sonraki aya düşebildiği
+    # için ilerletilmiş kesimin ayından devam etmek ayları atlayabilir.
+    next_after_begin = [_next_own_closing_after(p, prev_row_begin, compute_cache) for p in pairs]
 
-        if not candidates:
+    while used_rows < max_rows:
+        # En erken kesim, eşitlikte en geç ödeme: tek geçişte seçilir
+        best_closing, best_payment = date.max, date.min
+        picks: List[CardComputed] = []
+        for a, p in zip(next_after_begin, pairs):
+            if a.closing < best_closing:
+                best_closing, best_payment, picks = a.closing, a.payment, [p]
+            elif a.closing == best_closing:
+                if a.payment > best_payment:
+                    best_payment, picks = a.payment, [p]
+                elif a.payment == best_payment:
+                    picks.append(p)
+
+        if not picks:
             break
 
-        min_closing = min(c[0] for c in candidates)
-        near = [c for c in candidates if c[0] == min_closing]
-        max_payment = max(c[1] for c in near)
-        picks = [c[2] for c in near if c[1] == max_payment]
-
         row_begin = prev_row_end + timedelta(days=1)
-        all_next_closings = []
-        for p in pairs:
-            nxt = next_own_closing_after(p, row_begin)
-            all_next_closings.append(nxt.closing)
-        row_end = min(all_next_closings) if all_next_closings else row_begin
+        next_after_begin = [_next_own_closing_after(p, row_begin, compute_cache) for p in pairs]
+        row_end = min(a.closing for a in next_after_begin) if next_after_begin else row_begin
 
-        add_row(picks, row_begin, row_end, is_first=False)
+        _add_row(rows, picks, row_begin, row_end, is_first=False, fmt=fmt, cache=compute_cache)
 
         used_rows += 1
         prev_row_begin = row_begin
@@ -0,0 +1,39 @@
+# Regression tests: expected rows are the output of the original
+# month-by-month implementation for the same inputs.
+
+from datetime import datetime, timezone
+
+from card_scheduler import schedule_cards, CardInput
+
+
+def _rows(cards, system_dt):
+    rows = schedule_cards([CardInput(*c) for c in cards], system_dt=system_dt, language="tr")
+    return [(r["Kart Adı"], r["Beklenen Kesim"], r["Kullanım"], r["Kesim"], r["Ödeme"]) for r in rows]
+
+
+def test_large_negative_grace_month_jump():
+    cards = [("c0", None, 22, -40), ("D", None, 30, -40)]
+    assert _rows(cards, datetime(2027, 1, 5, 21, tzinfo=timezone.utc)) == [
+        ("D", "", "6 Oca – 3 Mar", "11 Mar", "1 Şub"),
+        ("c0", "3 Mar", "4 Mar – 11 Mar", "1 Haz", "22 Nis"),
+        ("D", "9 May", "12 Mar – 1 Haz", "9 Haz", "30 Nis"),
+    ]
+
+
+def test_negative_grace_row_cursor():
+    cards = [("c0", None, 14, -31), ("c1", None, 25, -20)]
+    assert _rows(cards, datetime(2025, 11, 28, 14, tzinfo=timezone.utc)) == [
+        ("c1", "", "28 Kas – 15 Ara", "14 Şub", "26 Oca"),
+        ("c1", "14 Şub", "16 Ara – 14 Şub", "17 Mar", "25 Şub"),
+        ("c1", "17 Mar", "15 Şub – 17 Mar", "14 Nis", "25 Mar"),
+    ]
+
+
+def test_duplicate_card_names_are_merged():
+    cards = [("A", 5, None, 10), ("A", 20, None, 25), ("B", 12, None, 10)]
+    assert _rows(cards, datetime(2026, 3, 10, tzinfo=timezone.utc)) == [
+        ("A", "", "10 Mar – 12 Mar", "20 Mar", "14 Nis"),
+        ("B", "12 Mar", "13 Mar – 20 Mar", "12 Nis", "22 Nis"),
+        ("A", "20 Mar", "21 Mar – 12 Nis", "20 Nis", "15 May"),
+        ("B", "12 Nis", "13 Nis – 20 Nis", "12 May", "22 May"),
+    ]